@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Latency of the TaskCRUD read paths against a seeded dataset.
+
+Usage: python benchmarks/bench_task_reads.py [--users N] [--tasks N] [--seed N] [--iterations N]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from src.auth import get_user_by_username  # noqa: E402
+from src.models import TaskDB  # noqa: E402
+from src.seed import seeded_database  # noqa: E402
+from src.tasks.crud import TaskCRUD  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+
+
+async def timed(session_maker, iterations, call):
+    samples = []
+    for i in range(iterations):
+        async with session_maker() as db:
+            started = time.perf_counter()
+            await call(db, i)
+            samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+async def run(args):
+    url = await seeded_database(DATA_DIR, users=args.users, tasks=args.tasks, seed=args.seed)
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as db:
+        # The heaviest user by task count, the Zipf head
+        heavy = (await db.execute(
+            select(TaskDB.owner_id).group_by(TaskDB.owner_id).order_by(func.count().desc()).limit(1)
+        )).scalar()
+        task_id = (await db.execute(select(TaskDB.id).where(TaskDB.owner_id == heavy).limit(1))).scalar()
+
+    cases = {
+        "get_user_by_username": lambda db, i: get_user_by_username(db, f"user{i % args.users + 1:07d}"),
+        "get_task_by_id": lambda db, i: TaskCRUD.get_task_by_id(db, task_id, heavy),
+        "get_tasks_by_user (tail user)": lambda db, i: TaskCRUD.get_tasks_by_user(db, i % args.users + 1),
+        "get_tasks_by_user tag=work": lambda db, i: TaskCRUD.get_tasks_by_user(db, i % args.users + 1, tags=["work"]),
+        "get_tag_counts": lambda db, i: TaskCRUD.get_tag_counts(db, i % args.users + 1),
+    }
+    for name, call in cases.items():
+        median, p95 = await timed(session_maker, args.iterations, call)
+        print(f"{name:>32}: median {median:8.1f} µs   p95 {p95:8.1f} µs")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
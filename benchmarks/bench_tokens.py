@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Verify cost per request for each access token codec.
+
+Usage: python benchmarks/bench_tokens.py [--iterations N]
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tokens import CODECS  # noqa: E402
+
+SECRET = "benchmark-secret-key"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    claims = {"sub": "benchmark-user", "uid": 42, "exp": datetime.utcnow() + timedelta(minutes=30)}
+    results = {}
+    for name, codec_class in CODECS.items():
+        codec = codec_class(SECRET)
+        token = codec.encode(claims)
+        assert codec.decode(token)["uid"] == 42
+        seconds = min(timeit.repeat(lambda: codec.decode(token), number=args.iterations, repeat=3))
+        results[name] = seconds / args.iterations * 1e6
+        print(f"{name:>8}: {results[name]:7.2f} µs/verify  ({len(token)} byte token)")
+
+    baseline = results.get("jwt")
+    for name, micros in results.items():
+        if baseline and name != "jwt":
+            print(f"{name} is {baseline / micros:.1f}x faster than jwt")
+
+
+if __name__ == "__main__":
+    main()
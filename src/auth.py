@@ -2,18 +2,23 @@ from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam
 
 from .config import settings
 from .database import get_db
 from .models import User as UserModel
+from .singleflight import detached, read_flights
 from .tasks.models import User, TokenData
+from .tokens import InvalidToken, get_token_codec
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+token_codec = get_token_codec(settings.token_codec, settings.secret_key, settings.algorithm)
+
+# Built once, see the statements at the top of tasks/crud.py
+SELECT_USER_BY_USERNAME = select(UserModel).where(UserModel.username == bindparam("username"))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -31,13 +36,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
-    return encoded_jwt
+    return token_codec.encode(to_encode)
 
 
 async def get_user_by_username(db: AsyncSession, username: str):
-    result = await db.execute(select(UserModel).where(UserModel.username == username))
-    return result.scalar_one_or_none()
+    # Coalesced: concurrent lookups of the same user share one query
+    async def query():
+        result = await db.execute(SELECT_USER_BY_USERNAME, {"username": username})
+        return detached(db, [result.scalar_one_or_none()])[0]
+    return await read_flights.do(("user", username), query)
 
 
 async def authenticate_user(db: AsyncSession, username: str, password: str):
@@ -49,26 +56,52 @@ async def authenticate_user(db: AsyncSession, username: str, password: str):
     return user
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_access_token(token: str) -> TokenData:
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = token_codec.decode(token)
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
+            raise credentials_exception()
+        return TokenData(username=username, user_id=payload.get("uid"))
+    except (InvalidToken, ValueError):
+        raise credentials_exception()
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    token_data = decode_access_token(token)
     user = await get_user_by_username(db, username=token_data.username)
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
     return user
 
 
+async def get_current_user_id(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> int:
+    """User id for read routes that need nothing else from the user row.
+
+    With a codec that ``carries_user_id`` (compact), tokens issued to active
+    users hold the id, so the users lookup is skipped; the trade-off is that
+    deactivating a user only takes effect for these routes once their token
+    expires. Write routes keep using ``get_current_active_user``.
+    """
+    token_data = decode_access_token(token)
+    if token_data.user_id is not None and token_codec.carries_user_id:
+        return token_data.user_id
+    user = await get_user_by_username(db, username=token_data.username)
+    if user is None:
+        raise credentials_exception()
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user.id
+
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -1,16 +1,20 @@
+import logging
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from .auth import authenticate_user, create_access_token, get_password_hash, get_current_active_user
+from .auth import authenticate_user, create_access_token, get_password_hash, get_current_active_user, token_codec
 from .config import settings
 from .database import get_db
+from .log import log_event
 from .models import User as UserModel
+from .singleflight import read_flights
 from .tasks.models import User, UserCreate, Token
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
+logger = logging.getLogger(__name__)
 
 
 @router.post("/register", response_model=User)
@@ -42,14 +46,15 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         db.add(db_user)
         await db.commit()
         await db.refresh(db_user)
+        read_flights.forget("user", db_user.username)
         
-        print(f"✅ User registered: {db_user.username}")
+        log_event(logger, "user_registered", user_id=db_user.id)
         return db_user
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Registration error: {e}")
+        log_event(logger, "registration_failed", logging.ERROR, error=str(e))
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -68,15 +73,19 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
                 headers={"WWW-Authenticate": "Bearer"},
             )
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+        claims = {"sub": user.username}
+        if user.is_active and token_codec.carries_user_id:
+            # Lets task read routes skip the users lookup, see get_current_user_id
+            claims["uid"] = user.id
         access_token = create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
+            data=claims, expires_delta=access_token_expires
         )
-        print(f"✅ User logged in: {user.username}")
+        log_event(logger, "user_logged_in", user_id=user.id)
         return {"access_token": access_token, "token_type": "bearer"}
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Login error: {e}")
+        log_event(logger, "login_failed", logging.ERROR, error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Login failed"
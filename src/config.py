@@ -1,4 +1,5 @@
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings
 
 
@@ -7,6 +8,43 @@ class Settings(BaseSettings):
     secret_key: str = os.getenv("SECRET_KEY", "local-dev-secret-key-123456789")
     algorithm: str = "HS256" 
     access_token_expire_minutes: int = 30
+    token_codec: str = "jwt"  # "jwt" or "compact", see src/tokens.py
+
+    # Logging: LOG_SAMPLE_RATES is JSON, e.g. {"http_request": 0.01}
+    log_level: str = "INFO"
+    log_sample_rates: Dict[str, float] = {"http_request": 0.1}
+    log_queue_size: int = 10_000  # records waiting for the writer; beyond that they're dropped
+    db_echo: bool = False  # log every SQL statement (slow, for debugging)
+
+    # Statement caches: SQLAlchemy's compiled SQL (per engine) and asyncpg's
+    # server-side prepared statements (per connection); 0 disables either.
+    # The prepared statement cache only applies to a postgresql+asyncpg
+    # DATABASE_URL; asyncpg is not in requirements.txt and must be installed
+    # separately, otherwise the setting does nothing.
+    db_query_cache_size: int = 500
+    db_prepared_statement_cache_size: int = 100
+
+    # Write-behind (group commit) for task updates - opt-in. PUT still reads the
+    # task before queueing (ownership check and response body), so updates get
+    # about 2.5x faster, not 10x; see benchmarks/bench_task_writes.py
+    task_write_behind: bool = False
+    task_write_behind_interval_ms: int = 5
+    task_write_behind_max_batch: int = 500
+    task_write_behind_journal: str = ""  # empty = in-memory queue only
+    task_write_behind_fsync: str = "interval"  # "always", "interval" or "none"
+
+    # Connection pool warm-up and readiness probe
+    db_pool_min_size: int = 2
+    db_ready_timeout: float = 1.0
+
+    # Background purge of soft-deleted tasks
+    purge_enabled: bool = True
+    purge_interval_seconds: float = 60
+    purge_grace_seconds: float = 300  # keep deleted rows around this long
+    purge_batch_size: int = 500
+    purge_max_batch_size: int = 5000
+    purge_target_latency_ms: float = 50
+    purge_vacuum_pages: int = 200  # SQLite incremental_vacuum pages per round
     
     @property
     def database_url(self) -> str:
@@ -1,26 +1,88 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.util import LRUCache
+
+from .log import install_query_timing, log_event
+
+logger = logging.getLogger(__name__)
 
 # Engine will be created lazily
 engine = None
 async_session_maker = None
+# The engine's compiled-statement cache; owned here so its fill can be reported
+compiled_cache = None
+
+# Set once the pool has been pre-warmed at startup
+pool_warm = False
+
+# Compiled-statement cache lookups, counted by install_statement_cache_stats
+statement_cache_stats = {"hits": 0, "misses": 0, "uncached": 0}
 
 def get_engine():
-    global engine, async_session_maker
+    global engine, async_session_maker, compiled_cache
     if engine is None:
         from .config import settings
-        print("🔗 Creating SQLite database engine...")
+        driver = settings.database_url.split(":", 1)[0]
+        log_event(logger, "db_engine_created", dialect=driver)
+        connect_args = {}
+        if driver.startswith("sqlite"):
+            connect_args["check_same_thread"] = False
+        elif driver == "postgresql+asyncpg":
+            # Statements are prepared once per connection and reused by name
+            connect_args["prepared_statement_cache_size"] = settings.db_prepared_statement_cache_size
+        # None disables caching, same as query_cache_size=0
+        compiled_cache = LRUCache(settings.db_query_cache_size) if settings.db_query_cache_size else None
         engine = create_async_engine(
             settings.database_url, 
-            echo=True,
-            connect_args={"check_same_thread": False}  # SQLite specific
+            echo=settings.db_echo,
+            execution_options={"compiled_cache": compiled_cache},
+            connect_args=connect_args,
         )
         async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        install_query_timing(engine.sync_engine)
+        install_statement_cache_stats(engine.sync_engine)
     return engine
 
 class Base(DeclarativeBase):
     pass
 
+def create_tables(conn):
+    """Create missing tables, then add columns/indexes newer than the table.
+
+    Meant for ``conn.run_sync``. ``create_all`` skips tables that already
+    exist, so nullable columns and indexes added to a model later are
+    created here for databases made by an older version of the app.
+    """
+    if conn.dialect.name == "sqlite":
+        # Lets the purge job give pages back. Only takes effect on a new
+        # database: an existing one keeps auto_vacuum = NONE until a VACUUM,
+        # which is too slow to run unasked at startup on a large file
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 0:
+            log_event(logger, "db_auto_vacuum_off", logging.WARNING,
+                      hint="run VACUUM once so purged tasks give their space back")
+    existing = set(inspect(conn).get_table_names())
+    Base.metadata.create_all(conn)
+
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns and column.nullable:
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
 # Dependency to get database session
 async def get_db():
     get_engine()  # Ensure engine is created
@@ -31,3 +93,72 @@ async def get_db():
             await session.close()
 
 
+async def warm_up_pool(engine, min_size: int) -> int:
+    """Open ``min_size`` connections up front so requests find them ready"""
+    global pool_warm
+    size = getattr(engine.pool, "size", None)
+    if callable(size):
+        min_size = min(min_size, size())
+    else:
+        min_size = min(min_size, 1)  # Static/singleton pools hold one connection
+
+    # Hold all connections open at once, otherwise the pool reuses just one
+    conns = [await engine.connect() for _ in range(min_size)]
+    try:
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in conns))
+    finally:
+        for conn in conns:
+            await conn.close()
+    pool_warm = True
+    return min_size
+
+
+async def check_database(engine, timeout: float) -> float:
+    """Run ``SELECT 1`` within ``timeout`` seconds, return latency in ms"""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def probe():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.wait_for(probe(), timeout=timeout)
+    return round((loop.time() - started) * 1000, 2)
+
+
+def pool_status(engine) -> dict:
+    """Connection pool counters for health endpoints"""
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        counter = getattr(pool, name, None)
+        if callable(counter):
+            stats[name] = counter()
+    return stats
+
+
+def install_statement_cache_stats(sync_engine):
+    """Count compiled-cache hits and misses for statements sent to the database"""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if context is None or context.compiled is None:
+            return  # exec_driver_sql() bypasses the compiler
+        if context.cache_hit is CacheStats.CACHE_HIT:
+            statement_cache_stats["hits"] += 1
+        elif context.cache_hit is CacheStats.CACHE_MISS:
+            statement_cache_stats["misses"] += 1
+        else:
+            statement_cache_stats["uncached"] += 1
+
+
+def statement_cache_status(cache: Optional[LRUCache]) -> dict:
+    """Compiled-cache counters, hit rate and fill for health endpoints"""
+    hits, misses = statement_cache_stats["hits"], statement_cache_stats["misses"]
+    status = {
+        **statement_cache_stats,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "size": len(cache) if cache is not None else 0,
+        "capacity": cache.capacity if cache is not None else 0,
+    }
+    return status
@@ -0,0 +1,164 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import event
+
+# Per-request state; the stats object is mutated in place so that values
+# recorded inside the endpoint task are visible to the middleware.
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+request_stats_var: ContextVar[Optional["RequestStats"]] = ContextVar("request_stats", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["ContextQueueHandler"] = None
+_traceback_formatter = logging.Formatter()
+
+
+class RequestStats:
+    __slots__ = ("db_queries", "db_time_ms")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time_ms = 0.0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event, request id, fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None) or record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records per event name; warnings and errors always pass"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Stamps the request id on the record before it leaves the request's context.
+
+    Unlike the stock ``prepare`` this doesn't format the record here, only
+    resolves what can't cross threads (message args, traceback objects).
+    The queue is bounded: when the writer falls behind (slow stdout), new
+    records are dropped and counted instead of piling up in memory.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.request_id = request_id_var.get()
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Blocking put: the stock put_nowait fails if the queue is full at shutdown
+        self.queue.put(self._sentinel)
+
+
+def setup_logging(level: str = "INFO", sample_rates: Optional[Dict[str, float]] = None, stream=None,
+                  max_queued: int = 10_000):
+    """Route all logging through a queue drained by a background writer thread.
+
+    Request handlers only pay for building the record and a ``put_nowait``;
+    formatting and the write to stdout happen on the listener thread. At
+    most ``max_queued`` records wait for the writer, see ``log_stats``.
+    """
+    global _listener, _handler
+    if _listener is None:
+        atexit.register(stop_logging)
+    else:
+        _listener.stop()
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(JsonFormatter())
+    handler = _handler = ContextQueueHandler(queue.Queue(maxsize=max_queued))
+    handler.addFilter(SamplingFilter(sample_rates or {}))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
+
+    _listener = _Listener(handler.queue, writer, respect_handler_level=False)
+    _listener.start()
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_stats() -> dict:
+    """Records waiting for the writer and records dropped because the queue was full"""
+    if _handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
+
+
+def log_event(logger: logging.Logger, event_name: str, level: int = logging.INFO, **fields):
+    """Log a structured event; ``fields`` end up as top-level JSON keys"""
+    if logger.isEnabledFor(level):
+        exc_info = fields.pop("exc_info", None)
+        logger.log(level, event_name, exc_info=exc_info, extra={"event": event_name, "fields": fields})
+
+
+def install_query_timing(sync_engine):
+    """Add each statement's time to the current request's RequestStats"""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        stats = request_stats_var.get()
+        if stats is not None and started is not None:
+            stats.db_queries += 1
+            stats.db_time_ms += (time.perf_counter() - started) * 1000
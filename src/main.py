@@ -1,38 +1,62 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import os
+import time
+import uuid
 
 from .config import settings
-from .database import get_engine
+from . import database
+from .database import (
+    get_engine, create_tables, warm_up_pool, check_database, pool_status, statement_cache_status,
+)
+from .log import RequestStats, log_event, log_stats, request_id_var, request_stats_var, setup_logging
 from .models import Base
+from .singleflight import read_flights
 from .tasks.api import router as tasks_router
+from .tasks.purge import task_purger
+from .tasks.write_behind import task_write_queue
 from .auth_api import router as auth_router
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging: JSON lines written by a background thread
+setup_logging(settings.log_level, settings.log_sample_rates, max_queued=settings.log_queue_size)
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # App startup - create database tables
-    print("🚀 Application starting...")
-    print("📊 Creating database tables...")
+    log_event(logger, "app_starting")
     try:
         from .database import get_engine
         from .models import Base
         
         engine = get_engine()
         async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("✅ Database tables created successfully")
+            await conn.run_sync(create_tables)
+        log_event(logger, "db_tables_created")
+    except Exception as e:
+        log_event(logger, "db_tables_failed", logging.ERROR, error=str(e))
+
+    # Pre-warm the pool so the first real request doesn't pay for connecting
+    try:
+        warmed = await warm_up_pool(get_engine(), settings.db_pool_min_size)
+        log_event(logger, "db_pool_warmed", connections=warmed)
     except Exception as e:
-        print(f"❌ Error creating database tables: {e}")
+        log_event(logger, "db_pool_warm_failed", logging.ERROR, error=str(e))
+
+    if settings.task_write_behind:
+        log_event(logger, "write_behind_started", interval_ms=settings.task_write_behind_interval_ms)
+        await task_write_queue.start(get_engine())
+    if settings.purge_enabled:
+        await task_purger.start(get_engine())
     yield
+    await task_purger.stop()
+    await task_write_queue.stop()
 
 
 app = FastAPI(
@@ -52,6 +76,28 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """Request id for log correlation, plus a sampled per-request log line"""
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    stats = RequestStats()
+    request_stats_var.set(stats)
+    started = time.perf_counter()
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    log_event(
+        logger, "http_request",
+        method=request.method,
+        path=request.url.path,
+        status=response.status_code,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+        db_queries=stats.db_queries,
+        db_time_ms=round(stats.db_time_ms, 2),
+    )
+    return response
+
+
 @app.get("/")
 def read_root():
     return {"message": f"Welcome to {settings.name}", "docs": "/docs"}
@@ -67,6 +113,39 @@ def health_check():
     }
 
 
+@app.get("/live")
+def liveness_probe():
+    """Liveness: the process is up and serving, no dependencies checked"""
+    return {"status": "alive"}
+
+
+@app.get("/ready")
+async def readiness_probe():
+    """Readiness: pool is warm and the database answers within the timeout"""
+    engine = get_engine()
+    if not database.pool_warm:
+        # Warm-up failed at startup (e.g. the database came up after us): retry
+        # here so the instance can still become ready
+        try:
+            warmed = await asyncio.wait_for(
+                warm_up_pool(engine, settings.db_pool_min_size), settings.db_ready_timeout
+            )
+            log_event(logger, "db_pool_warmed", connections=warmed)
+        except Exception as e:
+            log_event(logger, "db_pool_warm_failed", logging.WARNING, error=str(e) or type(e).__name__)
+    result = {"status": "ready", "pool_warm": database.pool_warm}
+    try:
+        result["db_latency_ms"] = await check_database(engine, settings.db_ready_timeout)
+    except Exception as e:
+        result["status"] = "not_ready"
+        result["error"] = str(e) or type(e).__name__
+    result["pool"] = pool_status(engine)
+    if not database.pool_warm:
+        result["status"] = "not_ready"
+    status_code = 200 if result["status"] == "ready" else 503
+    return JSONResponse(result, status_code=status_code)
+
+
 @app.get("/db-status")
 async def database_status():
     """Check database connection status"""
@@ -82,18 +161,22 @@ async def database_status():
     }
     
     try:
-        from .database import get_engine
         engine = get_engine()
-        # Just try to get the engine - this is enough to test connection
-        if engine:
-            result["connection_status"] = "connected"
-            result["message"] = "SQLite database connection successful"
-            result["database_file"] = "./tasks.db"
+        result["latency_ms"] = await check_database(engine, settings.db_ready_timeout)
+        result["connection_status"] = "connected"
+        result["message"] = "SQLite database connection successful"
+        result["database_file"] = "./tasks.db"
+        result["pool"] = pool_status(engine)
+        result["statement_cache"] = statement_cache_status(database.compiled_cache)
+        if engine.dialect.driver == "asyncpg":
+            result["statement_cache"]["prepared_statement_cache_size"] = settings.db_prepared_statement_cache_size
     except Exception as e:
         result["connection_status"] = "failed"
         result["message"] = f"Database connection failed: {str(e)}"
         result["error"] = str(e)
     
+    result["single_flight"] = read_flights.metrics()
+    result["logging"] = log_stats()
     return result
 
 
@@ -104,14 +187,13 @@ async def initialize_database():
         from .database import get_engine
         from .models import Base
         
-        print("🔄 Creating database tables...")
         engine = get_engine()
         async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("✅ Database tables created successfully")
+            await conn.run_sync(create_tables)
+        log_event(logger, "db_tables_created")
         return {"status": "success", "message": "Database initialized"}
     except Exception as e:
-        print(f"❌ Error creating database tables: {e}")
+        log_event(logger, "db_tables_failed", logging.ERROR, error=str(e))
         return {"status": "error", "message": f"Database initialization failed: {str(e)[:100]}"}
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Table, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -28,7 +28,42 @@ class TaskDB(Base):
     deadline = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Soft delete marker; rows are removed later by the purge job
+    deleted_at = Column(DateTime, nullable=True)
     
     # Foreign key to user
     owner_id = Column(Integer, ForeignKey("users.id"))
-    owner = relationship("User", back_populates="tasks") 
\ No newline at end of file
+    owner = relationship("User", back_populates="tasks")
+    tags = relationship("Tag", secondary="task_tags", lazy="selectin")
+
+    __table_args__ = (
+        # Normal read paths only see live tasks, the purge job only deleted ones
+        Index("ix_tasks_owner_live", owner_id,
+              sqlite_where=deleted_at.is_(None), postgresql_where=deleted_at.is_(None)),
+        Index("ix_tasks_deleted_at", deleted_at,
+              sqlite_where=deleted_at.is_not(None), postgresql_where=deleted_at.is_not(None)),
+    )
+
+
+# Junction table; the primary key serves task -> tags lookups,
+# the (tag_id, task_id) index serves tag -> tasks filtering
+task_tags = Table(
+    "task_tags",
+    Base.metadata,
+    Column("task_id", Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_task_tags_tag_task", "tag_id", "task_id"),
+)
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+    __table_args__ = (
+        Index("ix_tags_owner_name", "owner_id", "name", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String, nullable=False)
+    # Maintained incrementally by TaskCRUD when tags are attached/detached
+    task_count = Column(Integer, default=0, nullable=False) 
\ No newline at end of file
@@ -0,0 +1,320 @@
+"""Synthetic users and tasks for load tests and benchmarks.
+
+Usage: python -m src.seed --users 1000 --tasks 200000 --seed 42 [--reset]
+
+The same seed and sizes always produce the same rows. Tasks are spread over
+users with a Zipf distribution (a few heavy users, a long tail), and rows
+are written with batched driver-level executemany straight into the tables behind
+``src/models.py``.
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from .config import settings
+from .database import Base, create_tables
+from .models import User, TaskDB, Tag, task_tags
+
+# bcrypt hash of "loadtest-password"; hashing per user would dominate the run
+PASSWORD_HASH = "$2b$12$hEvcQYhl29lCgFxg/Zy2uOjIs5YQDabybDPJUYhrP4X0F0i41diMq"
+
+# Fixed reference time so that a seed always yields the same dataset
+REFERENCE_TIME = datetime(2025, 6, 1)
+
+TAG_NAMES = [
+    "work", "home", "urgent", "errands", "health", "finance", "study", "travel",
+    "family", "reading", "shopping", "ideas", "meetings", "someday", "garden", "car",
+]
+
+WORDS = (
+    "review update call plan send draft fix prepare book check order clean pay "
+    "schedule write read finish email follow-up report meeting budget invoice "
+    "doctor groceries project release backlog slides notes renew insurance "
+    "taxes gym laundry birthday gift dentist flight hotel documents contract"
+).split()
+
+
+def zipf_cum_weights(n: int, s: float):
+    """Cumulative Zipf weights for ranks 1..n"""
+    return list(itertools.accumulate(1 / rank ** s for rank in range(1, n + 1)))
+
+
+def column_names(table) -> tuple:
+    return tuple(column.name for column in table.c)
+
+# Tags per task: most tasks have none or one
+TAGS_PER_TASK = [0, 0, 0, 1, 1, 1, 1, 2, 2, 3]
+
+
+class Timestamps:
+    """Turns whole seconds since ``origin`` into column values.
+
+    For SQLite the text SQLAlchemy stores is assembled from per-day and
+    per-second lookup tables, which is several times cheaper than datetime
+    arithmetic plus formatting; other drivers get datetime objects.
+    """
+
+    def __init__(self, origin: datetime, days: int, as_text: bool):
+        self.origin = origin
+        if as_text:
+            self.days = [(origin + timedelta(days=day)).strftime("%Y-%m-%d") for day in range(days)]
+            self.clock = [f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}.000000"
+                          for second in range(86400)]
+            self.at = self._text
+        else:
+            self.at = self._datetime
+
+    def _text(self, seconds: int) -> str:
+        day, second = divmod(seconds, 86400)
+        return f"{self.days[day]} {self.clock[second]}"
+
+    def _datetime(self, seconds: int) -> datetime:
+        return self.origin + timedelta(seconds=seconds)
+
+
+class DatasetGenerator:
+    """Yields rows as tuples in the column order of the tables in ``src/models.py``.
+
+    Inserts take their column lists from the tables, so a column added to a
+    model makes them fail (wrong number of values) rather than silently drift.
+    """
+
+    HISTORY_DAYS = 400  # users are created this long before ``now``
+    MAX_DEADLINE_HOURS = 365 * 24
+
+    def __init__(self, users: int, tasks: int, seed: int = 42, zipf_s: float = 1.1,
+                 completed_ratio: float = 0.4, deleted_ratio: float = 0.02,
+                 now: datetime = REFERENCE_TIME, sqlite_timestamps: bool = False):
+        self.users = users
+        self.tasks = tasks
+        self.rng = random.Random(seed)
+        self.zipf_s = zipf_s
+        self.completed_ratio = completed_ratio
+        self.deleted_ratio = deleted_ratio
+        origin = datetime.combine((now - timedelta(days=self.HISTORY_DAYS)).date(), datetime.min.time())
+        self.now = int((now - origin).total_seconds())
+        days = self.now // 86400 + self.MAX_DEADLINE_HOURS // 24 + 2
+        self.timestamps = Timestamps(origin, days, as_text=sqlite_timestamps)
+        # Text is sliced out of one long blob instead of joined word by word
+        self._text = " ".join(self.rng.choice(WORDS) for _ in range(20000))
+        # Filled by task_rows(), read by tag_rows()
+        self.tag_counts = {}
+
+    def user_rows(self):
+        created_at = self.timestamps.at(0)
+        for user_id in range(1, self.users + 1):
+            name = f"user{user_id:07d}"
+            yield (user_id, name, f"{name}@example.com", PASSWORD_HASH, True, created_at)
+
+    def task_rows(self):
+        """Yield (task row, tag ids) pairs"""
+        rng = self.rng
+        # Bound methods and int(random() * n) instead of randrange: this is the hot loop
+        random_, gauss, expovariate = rng.random, rng.gauss, rng.expovariate
+        at, now, tag_counts = self.timestamps.at, self.now, self.tag_counts
+        # Heaviest users get random ids rather than always the lowest ones
+        owners = list(range(1, self.users + 1))
+        rng.shuffle(owners)
+        cum_weights = zipf_cum_weights(self.users, self.zipf_s)
+        total = cum_weights[-1]
+        tag_weights = zipf_cum_weights(len(TAG_NAMES), 1.0)
+        tag_total = tag_weights[-1]
+        tag_vocabulary = len(TAG_NAMES)
+        text, text_len = self._text, len(self._text)
+        year = 365 * 86400
+
+        for task_id in range(1, self.tasks + 1):
+            owner_id = owners[bisect.bisect(cum_weights, random_() * total)]
+            created = now - int(random_() * year)
+            updated = min(now, created + int(expovariate(1 / 86400)))
+
+            deadline = None
+            overdue = False
+            if random_() < 0.7:
+                # Mostly days to a few weeks after creation, occasionally months
+                hours = min(self.MAX_DEADLINE_HOURS, int(math.exp(gauss(4.5, 1.0))))
+                deadline = created + hours * 3600
+                overdue = deadline < now
+            completed = random_() < (0.8 if overdue else self.completed_ratio)
+
+            length = min(2000, int(math.exp(gauss(4.0, 0.9))))
+            start = int(random_() * (text_len - length))
+            title_start = int(random_() * (text_len - 40))
+            title = text[title_start:title_start + 8 + int(random_() * 32)].strip().capitalize() or "Task"
+
+            deleted = random_() < self.deleted_ratio
+            tag_ids = ()
+            tags_wanted = TAGS_PER_TASK[int(random_() * len(TAGS_PER_TASK))]
+            if tags_wanted:
+                first_tag = (owner_id - 1) * tag_vocabulary + 1
+                tag_ids = {
+                    first_tag + bisect.bisect(tag_weights, random_() * tag_total)
+                    for _ in range(tags_wanted)
+                }
+                if not deleted:
+                    for tag_id in tag_ids:
+                        tag_counts[tag_id] = tag_counts.get(tag_id, 0) + 1
+
+            updated_at = at(updated)
+            yield (
+                task_id, title, text[start:start + length], completed,
+                at(deadline) if deadline is not None else None, at(created), updated_at,
+                updated_at if deleted else None, owner_id,
+            ), tag_ids
+
+    def tag_rows(self):
+        # Every user gets the full vocabulary so tag ids are known up front
+        for tag_id in range(1, self.users * len(TAG_NAMES) + 1):
+            owner_index, index = divmod(tag_id - 1, len(TAG_NAMES))
+            yield (tag_id, owner_index + 1, TAG_NAMES[index], self.tag_counts.get(tag_id, 0))
+
+
+def batched(rows, size):
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def insert_sql(dialect, table) -> str:
+    """Driver-level INSERT of all of ``table``'s columns for executemany with positional parameters"""
+    columns = column_names(table)
+    if dialect.paramstyle == "qmark":
+        placeholders = ["?"] * len(columns)
+    elif dialect.paramstyle in ("numeric", "numeric_dollar"):
+        prefix = "$" if dialect.paramstyle == "numeric_dollar" else ":"
+        placeholders = [f"{prefix}{i}" for i in range(1, len(columns) + 1)]
+    elif dialect.paramstyle == "format":
+        placeholders = ["%s"] * len(columns)
+    else:
+        raise ValueError(f"Unsupported paramstyle: {dialect.paramstyle}")
+    return f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
+
+
+async def load(conn, sql: str, rows, batch_size: int):
+    """executemany ``rows`` in batches, building the next batch meanwhile.
+
+    Batches are built in a worker thread while the driver inserts the
+    previous one (sqlite3 releases the GIL while it steps), and plain
+    tuples skip SQLAlchemy's per-row parameter processing.
+    """
+    batches = batched(rows, batch_size)
+    pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+    while (batch := await pending) is not None:
+        pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+        await conn.exec_driver_sql(sql, batch)
+
+
+async def generate(engine, users: int = 1000, tasks: int = 100_000, seed: int = 42,
+                   batch_size: int = 20_000, reset: bool = False, **options) -> dict:
+    """Create the schema and fill it with a seeded dataset, return row counts and timing"""
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(create_tables)
+        existing = (await conn.execute(select(func.count()).select_from(User.__table__))).scalar()
+    if existing:
+        raise RuntimeError("Database already has users; pass reset=True (--reset) to replace them")
+
+    sqlite = engine.dialect.name == "sqlite"
+    generator = DatasetGenerator(users, tasks, seed=seed, sqlite_timestamps=sqlite, **options)
+    users_sql = insert_sql(engine.dialect, User.__table__)
+    tasks_sql = insert_sql(engine.dialect, TaskDB.__table__)
+    links_sql = insert_sql(engine.dialect, task_tags)
+    tags_sql = insert_sql(engine.dialect, Tag.__table__)
+
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        if sqlite:
+            # Bulk load: the dataset can always be regenerated from the seed
+            await conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        await load(conn, users_sql, generator.user_rows(), batch_size)
+        links = []
+
+        def task_rows():
+            for row, tag_ids in generator.task_rows():
+                links.extend((row[0], tag_id) for tag_id in tag_ids)
+                yield row
+
+        await load(conn, tasks_sql, task_rows(), batch_size)
+        await load(conn, links_sql, links, batch_size)
+        # Tags go last because their counts are known only now
+        await load(conn, tags_sql, generator.tag_rows(), batch_size)
+        if engine.dialect.name == "postgresql":
+            # Ids were inserted explicitly; move the sequences past them so the
+            # app's own inserts don't collide with seeded rows
+            for table in (User.__table__, TaskDB.__table__, Tag.__table__):
+                await conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence(:table, 'id'), coalesce(max(id), 0) + 1, false) "
+                    f"FROM {table.name}"
+                ), {"table": table.name})
+    elapsed = time.perf_counter() - started
+
+    async with engine.connect() as conn:
+        counts = {
+            table.name: (await conn.execute(select(func.count()).select_from(table))).scalar()
+            for table in (User.__table__, TaskDB.__table__, Tag.__table__, task_tags)
+        }
+    rows = sum(counts.values())
+    return {**counts, "seconds": round(elapsed, 2), "rows_per_second": int(rows / elapsed) if elapsed else rows}
+
+
+async def seeded_database(directory: str, users: int = 1000, tasks: int = 100_000, seed: int = 42) -> str:
+    """SQLite URL of a seeded dataset, generated once per (seed, users, tasks).
+
+    Benchmarks call this so they all start from the same reproducible data.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"seed{seed}-u{users}-t{tasks}.db")
+    url = f"sqlite+aiosqlite:///{path}"
+    if not os.path.exists(path):
+        engine = create_async_engine(url)
+        try:
+            await generate(engine, users=users, tasks=tasks, seed=seed)
+        except BaseException:
+            await engine.dispose()
+            os.remove(path)
+            raise
+        await engine.dispose()
+    return url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded load-test dataset")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for tasks per user")
+    parser.add_argument("--completed-ratio", type=float, default=0.4)
+    parser.add_argument("--deleted-ratio", type=float, default=0.02)
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--reset", action="store_true", help="Drop existing tables first")
+    args = parser.parse_args()
+
+    async def run():
+        engine = create_async_engine(args.database_url)
+        try:
+            return await generate(
+                engine, users=args.users, tasks=args.tasks, seed=args.seed,
+                batch_size=args.batch_size, reset=args.reset, zipf_s=args.zipf,
+                completed_ratio=args.completed_ratio, deleted_ratio=args.deleted_ratio,
+            )
+        finally:
+            await engine.dispose()
+
+    stats = asyncio.run(run())
+    print(f"🌱 Seeded {stats['users']} users, {stats['tasks']} tasks, {stats['task_tags']} tag links "
+          f"in {stats['seconds']}s ({stats['rows_per_second']} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
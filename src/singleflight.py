@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Tuple
+
+from sqlalchemy import inspect
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls into one in-flight awaitable.
+
+    The first caller for a key runs the coroutine; callers arriving while it
+    is still running await the same result instead of issuing their own
+    queries. Nothing is cached once the call has finished.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[Hashable, ...], asyncio.Future] = {}
+        self.stats = {"calls": 0, "executions": 0, "deduplicated": 0}
+
+    async def do(self, key: Tuple[Hashable, ...], fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["calls"] += 1
+        call = self._calls.get(key)
+        if call is None:
+            self.stats["executions"] += 1
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._release(key, done))
+        else:
+            self.stats["deduplicated"] += 1
+        # Shielded so one cancelled caller doesn't cancel the call for everybody
+        return await asyncio.shield(call)
+
+    def forget(self, *prefix: Hashable):
+        """Stop sharing in-flight calls whose key starts with ``prefix``.
+
+        Writers call this after committing so that reads issued afterwards
+        don't join a call that started before the write.
+        """
+        for key in [key for key in self._calls if key[:len(prefix)] == prefix]:
+            del self._calls[key]
+
+    def metrics(self) -> dict:
+        return {**self.stats, "in_flight": len(self._calls)}
+
+    def _release(self, key, call: asyncio.Future):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            call.exception()  # mark retrieved, callers already got it
+
+
+def detached(session, objects: Iterable[Any]) -> list:
+    """Expunge loaded ORM objects, and the related objects already loaded on
+    them, from ``session`` before the result is shared.
+
+    Coalesced results also reach requests whose own session didn't load them.
+    Once detached, a lazy load raises instead of silently running on another
+    request's (possibly closed) session, and changes can't be flushed by it.
+    """
+    objects = list(objects)
+    pending = [obj for obj in objects if obj is not None]
+    while pending:
+        obj = pending.pop()
+        if obj not in session:
+            continue
+        state = inspect(obj)
+        session.expunge(obj)
+        for relationship in state.mapper.relationships:
+            if relationship.key in state.unloaded:
+                continue
+            value = state.dict.get(relationship.key)
+            pending.extend(value if relationship.uselist else [value] if value is not None else [])
+    return objects
+
+
+# Shared by the read paths in auth and tasks
+read_flights = SingleFlight()
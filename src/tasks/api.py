@@ -1,11 +1,12 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..auth import get_current_active_user
+from ..auth import get_current_active_user, get_current_user_id
 from ..database import get_db
 from .crud import TaskCRUD
-from .models import Task, TaskCreate, TaskUpdate, User
+from .models import Task, TagCount, TaskCreate, TaskUpdate, User
+from .write_behind import TaskWriteQueue, task_write_queue
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
@@ -22,26 +23,42 @@ async def create_task(
 
 @router.get("/get_tasks", response_model=List[Task])
 async def get_tasks(
+    tag: Optional[List[str]] = Query(None),
+    match: str = Query("any", pattern="^(any|all)$"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    user_id: int = Depends(get_current_user_id)
 ):
-    """Get all tasks for the current user"""
-    return await TaskCRUD.get_tasks_by_user(db, current_user.id)
+    """Get all tasks for the current user, optionally filtered by tags"""
+    tasks = await TaskCRUD.get_tasks_by_user(db, user_id, tags=tag, match_all=match == "all")
+    if task_write_queue.running:
+        return [task_write_queue.overlay(task) for task in tasks]
+    return tasks
+
+
+@router.get("/tags", response_model=List[TagCount])
+async def get_tags(
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Get the current user's tags with the number of tasks for each"""
+    return await TaskCRUD.get_tag_counts(db, user_id)
 
 
 @router.get("/{task_id}", response_model=Task)
 async def get_task(
     task_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    user_id: int = Depends(get_current_user_id)
 ):
     """Get a specific task by ID"""
-    task = await TaskCRUD.get_task_by_id(db, task_id, current_user.id)
+    task = await TaskCRUD.get_task_by_id(db, task_id, user_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    if task_write_queue.running:
+        return task_write_queue.overlay(task)
     return task
 
 
@@ -53,7 +70,25 @@ async def update_task(
     current_user: User = Depends(get_current_active_user)
 ):
     """Update a specific task"""
-    task = await TaskCRUD.update_task(db, task_id, current_user.id, task_update)
+    user_id = current_user.id
+    values = task_update.model_dump(exclude_unset=True, exclude={"tags"})
+    try:
+        TaskWriteQueue.check_values(values)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    if task_write_queue.running and task_update.tags is None:
+        # Group commit: acknowledge once queued, the flusher writes it out.
+        # This read (ownership + response body) is now the bulk of the cost
+        task = await TaskCRUD.get_task_by_id(db, task_id, user_id)
+        if task:
+            await task_write_queue.enqueue(task_id, user_id, values)
+            task = task_write_queue.overlay(task)
+    else:
+        if task_write_queue.running:
+            # Queued updates must land before this one to keep per-task order
+            await task_write_queue.flush()
+        task = await TaskCRUD.update_task(db, task_id, user_id, task_update)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,4 +110,5 @@ async def delete_task(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    task_write_queue.discard(task_id)
     return {"message": "Task deleted successfully"}
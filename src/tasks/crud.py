@@ -1,62 +1,185 @@
-from typing import List, Optional
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, and_, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import selectinload
 
-from ..models import TaskDB, User
+from ..models import TaskDB, Tag, User, task_tags
+from ..singleflight import detached, read_flights
 from .models import TaskCreate, TaskUpdate
 
+# Hot statements are built once; their cache keys are memoized, so each call
+# only binds parameters and hits the engine's compiled cache.
+SELECT_TASK = select(TaskDB).where(
+    and_(TaskDB.id == bindparam("task_id"), TaskDB.owner_id == bindparam("user_id"), TaskDB.deleted_at.is_(None))
+)
+SELECT_TAGS_BY_USER = select(Tag).where(Tag.owner_id == bindparam("user_id")).order_by(Tag.name)
+SELECT_TAGS_BY_NAME = select(Tag).where(
+    Tag.owner_id == bindparam("user_id"), Tag.name.in_(bindparam("names", expanding=True))
+)
+SOFT_DELETE_TASK = (
+    update(TaskDB)
+    .where(TaskDB.id == bindparam("task_id"), TaskDB.owner_id == bindparam("user_id"), TaskDB.deleted_at.is_(None))
+    .values(deleted_at=bindparam("now"))
+    .execution_options(synchronize_session=False)
+)
+# Concurrent requests may create the same new tag; the loser's insert is a no-op.
+# ON CONFLICT needs the dialect's own insert(), hence one statement per dialect.
+INSERT_TAGS = {
+    name: insert(Tag.__table__)
+    .values(owner_id=bindparam("user_id"), name=bindparam("tag_name"), task_count=0)
+    .on_conflict_do_nothing(index_elements=["owner_id", "name"])
+    for name, insert in (("sqlite", sqlite.insert), ("postgresql", postgresql.insert))
+}
+SELECT_TASK_TAG_IDS = select(task_tags.c.tag_id).where(task_tags.c.task_id == bindparam("task_id"))
+ADJUST_TAG_COUNTS = (
+    update(Tag)
+    .where(Tag.id.in_(bindparam("tag_ids", expanding=True)))
+    .values(task_count=Tag.task_count + bindparam("delta"))
+    .execution_options(synchronize_session=False)
+)
+
+
+@lru_cache(maxsize=32)
+def select_tasks_by_user(tag_count: int = 0, match_all: bool = False):
+    """Task list statement for a number of tag filters, bound as ``tag_0``, ``tag_1``, ..."""
+    stmt = select(TaskDB).where(TaskDB.owner_id == bindparam("user_id"), TaskDB.deleted_at.is_(None))
+    tag_names = [bindparam(f"tag_{i}") for i in range(tag_count)]
+    if tag_names and match_all:
+        for name in tag_names:
+            tag_id = select(Tag.id).where(Tag.owner_id == bindparam("user_id"), Tag.name == name).scalar_subquery()
+            stmt = stmt.where(TaskDB.id.in_(
+                select(task_tags.c.task_id).where(task_tags.c.tag_id == tag_id)
+            ))
+    elif tag_names:
+        tag_ids = select(Tag.id).where(Tag.owner_id == bindparam("user_id"), Tag.name.in_(tag_names))
+        stmt = stmt.where(TaskDB.id.in_(
+            select(task_tags.c.task_id).where(task_tags.c.tag_id.in_(tag_ids))
+        ))
+    return stmt
+
 
 class TaskCRUD:
     @staticmethod
     async def create_task(db: AsyncSession, task_data: TaskCreate, user_id: int) -> TaskDB:
+        tags = await TaskCRUD._resolve_tags(db, user_id, task_data.tags)
         db_task = TaskDB(
             title=task_data.title,
             description=task_data.description,
             deadline=task_data.deadline,
-            owner_id=user_id
+            owner_id=user_id,
+            tags=tags
         )
         db.add(db_task)
+        await db.flush()
+        await TaskCRUD._adjust_tag_counts(db, [tag.id for tag in tags], 1)
         await db.commit()
         await db.refresh(db_task)
+        read_flights.forget("tasks", user_id)
         return db_task
 
+    # Read methods are coalesced: identical concurrent calls share one query,
+    # so the results are detached from the session and must be treated as read-only.
     @staticmethod
-    async def get_tasks_by_user(db: AsyncSession, user_id: int) -> List[TaskDB]:
-        result = await db.execute(
-            select(TaskDB).where(TaskDB.owner_id == user_id)
-        )
-        return result.scalars().all()
+    async def get_tasks_by_user(
+        db: AsyncSession, user_id: int, tags: Optional[List[str]] = None, match_all: bool = False
+    ) -> List[TaskDB]:
+        tags = TaskCRUD._normalize_tags(tags or [])
+
+        async def query():
+            params = {"user_id": user_id, **{f"tag_{i}": name for i, name in enumerate(tags)}}
+            result = await db.execute(select_tasks_by_user(len(tags), match_all), params)
+            return detached(db, result.scalars().all())
+        return await read_flights.do(("tasks", user_id, "list", tuple(tags), match_all), query)
 
     @staticmethod
     async def get_task_by_id(db: AsyncSession, task_id: int, user_id: int) -> Optional[TaskDB]:
-        result = await db.execute(
-            select(TaskDB).where(
-                and_(TaskDB.id == task_id, TaskDB.owner_id == user_id)
-            )
-        )
+        async def query():
+            task = await TaskCRUD._select_task(db, task_id, user_id)
+            return detached(db, [task])[0]
+        return await read_flights.do(("tasks", user_id, "task", task_id), query)
+
+    @staticmethod
+    async def get_tag_counts(db: AsyncSession, user_id: int) -> List[Tag]:
+        async def query():
+            result = await db.execute(SELECT_TAGS_BY_USER, {"user_id": user_id})
+            return detached(db, result.scalars().all())
+        return await read_flights.do(("tasks", user_id, "tags"), query)
+
+    @staticmethod
+    async def _select_task(db: AsyncSession, task_id: int, user_id: int) -> Optional[TaskDB]:
+        # Not coalesced - used by writers that modify the loaded object
+        result = await db.execute(SELECT_TASK, {"task_id": task_id, "user_id": user_id})
         return result.scalar_one_or_none()
 
     @staticmethod
     async def update_task(db: AsyncSession, task_id: int, user_id: int, task_update: TaskUpdate) -> Optional[TaskDB]:
-        db_task = await TaskCRUD.get_task_by_id(db, task_id, user_id)
+        db_task = await TaskCRUD._select_task(db, task_id, user_id)
         if not db_task:
             return None
-        
+
         update_data = task_update.dict(exclude_unset=True)
+        tag_names = update_data.pop("tags", None)
         for field, value in update_data.items():
             setattr(db_task, field, value)
-        
+
+        if tag_names is not None:
+            old_ids = {tag.id for tag in db_task.tags}
+            db_task.tags = await TaskCRUD._resolve_tags(db, user_id, tag_names)
+            await db.flush()
+            new_ids = {tag.id for tag in db_task.tags}
+            await TaskCRUD._adjust_tag_counts(db, new_ids - old_ids, 1)
+            await TaskCRUD._adjust_tag_counts(db, old_ids - new_ids, -1)
+
         await db.commit()
         await db.refresh(db_task)
+        read_flights.forget("tasks", user_id)
         return db_task
 
     @staticmethod
     async def delete_task(db: AsyncSession, task_id: int, user_id: int) -> bool:
-        db_task = await TaskCRUD.get_task_by_id(db, task_id, user_id)
-        if not db_task:
+        # Soft delete: a single UPDATE, no load; TaskPurger removes the row later
+        result = await db.execute(
+            SOFT_DELETE_TASK, {"task_id": task_id, "user_id": user_id, "now": datetime.utcnow()}
+        )
+        if result.rowcount == 0:
             return False
-        
-        await db.delete(db_task)
+
+        tag_ids = await db.execute(SELECT_TASK_TAG_IDS, {"task_id": task_id})
+        await TaskCRUD._adjust_tag_counts(db, tag_ids.scalars().all(), -1)
         await db.commit()
+        read_flights.forget("tasks", user_id)
         return True
+
+    @staticmethod
+    def _normalize_tags(names: Iterable[str]) -> List[str]:
+        # Strip whitespace, drop empties and duplicates, keep the given order
+        return list(dict.fromkeys(name.strip() for name in names if name.strip()))
+
+    @staticmethod
+    async def _resolve_tags(db: AsyncSession, user_id: int, names: Iterable[str]) -> List[Tag]:
+        """Load the user's tags by name, creating the missing ones"""
+        names = TaskCRUD._normalize_tags(names)
+        if not names:
+            return []
+        result = await db.execute(SELECT_TAGS_BY_NAME, {"user_id": user_id, "names": names})
+        tags = {tag.name: tag for tag in result.scalars()}
+        missing = [name for name in names if name not in tags]
+        if missing:
+            await db.execute(
+                INSERT_TAGS[db.bind.dialect.name],
+                [{"user_id": user_id, "tag_name": name} for name in missing],
+            )
+            # Re-select: rows inserted by a concurrent request are not returned by ours
+            result = await db.execute(SELECT_TAGS_BY_NAME, {"user_id": user_id, "names": missing})
+            tags.update((tag.name, tag) for tag in result.scalars())
+        return [tags[name] for name in names]
+
+    @staticmethod
+    async def _adjust_tag_counts(db: AsyncSession, tag_ids: Iterable[int], delta: int):
+        # Done in SQL so concurrent requests can't lose increments
+        tag_ids = list(tag_ids)
+        if tag_ids:
+            await db.execute(ADJUST_TAG_COUNTS, {"tag_ids": tag_ids, "delta": delta})
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, field_validator
 
 
 # User models
@@ -35,6 +35,7 @@ class TaskCreate(BaseModel):
     title: str
     description: str
     deadline: Optional[datetime] = None
+    tags: List[str] = []
 
 
 class TaskUpdate(BaseModel):
@@ -42,6 +43,7 @@ class TaskUpdate(BaseModel):
     description: Optional[str] = None
     completed: Optional[bool] = None
     deadline: Optional[datetime] = None
+    tags: Optional[List[str]] = None
 
 
 class Task(BaseModel):
@@ -55,6 +57,22 @@ class Task(BaseModel):
     created_at: datetime
     updated_at: datetime
     owner_id: int
+    tags: List[str] = []
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def tag_names(cls, value):
+        # ORM objects carry Tag rows, API responses carry just the names.
+        # Sorted here rather than in SQL, where it would cost a temp B-tree
+        return sorted(getattr(tag, "name", tag) for tag in value or [])
+
+
+# Tag models
+class TagCount(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    name: str
+    task_count: int
 
 
 # Auth models
@@ -65,3 +83,4 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from ..config import settings
+from ..log import log_event
+from ..models import TaskDB, task_tags
+
+logger = logging.getLogger(__name__)
+
+
+class TaskPurger:
+    """Background job that hard-deletes soft-deleted tasks.
+
+    Rows are removed in bounded chunks, each in its own short transaction.
+    The chunk size follows the observed latency: it is halved when a chunk
+    takes longer than ``target_latency_ms`` and grows slowly otherwise, and
+    the job sleeps between chunks so foreground writers get the database.
+    """
+
+    def __init__(self, interval_seconds: float = 60, grace_seconds: float = 300,
+                 batch_size: int = 500, max_batch_size: int = 5000,
+                 target_latency_ms: float = 50, vacuum_pages: int = 200):
+        self.interval = interval_seconds
+        self.grace = timedelta(seconds=grace_seconds)
+        self.batch_size = batch_size
+        self.min_batch_size = min(10, batch_size)
+        self.max_batch_size = max_batch_size
+        self.step = max(1, batch_size // 10)
+        self.target_latency_ms = target_latency_ms
+        self.vacuum_pages = vacuum_pages
+        self._engine = None
+        self._runner: Optional[asyncio.Task] = None
+        self.stats = {"purged": 0, "chunks": 0, "slow_chunks": 0, "last_chunk_ms": 0.0}
+
+    async def start(self, engine):
+        self._engine = engine
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+
+    async def purge_once(self) -> int:
+        """Delete every task soft-deleted before the grace period, chunk by chunk"""
+        loop = asyncio.get_running_loop()
+        cutoff = datetime.utcnow() - self.grace
+        total = 0
+        while True:
+            size = self.batch_size
+            started = loop.time()
+            deleted = await self._purge_chunk(cutoff, size)
+            elapsed_ms = (loop.time() - started) * 1000
+            total += deleted
+            if deleted:
+                self._adapt(elapsed_ms)
+            if deleted < size:
+                break
+            # Sleep at least as long as the chunk took; twice as long when slow
+            slow = elapsed_ms > self.target_latency_ms
+            await asyncio.sleep(elapsed_ms / 1000 * (2 if slow else 1))
+        if total:
+            self.stats["purged"] += total
+            await self._vacuum()
+        return total
+
+    async def _purge_chunk(self, cutoff: datetime, size: int) -> int:
+        async with self._engine.begin() as conn:
+            result = await conn.execute(
+                select(TaskDB.id)
+                .where(TaskDB.deleted_at.is_not(None), TaskDB.deleted_at < cutoff)
+                .limit(size)
+            )
+            ids = result.scalars().all()
+            if ids:
+                # Junction rows first; SQLite doesn't enforce ON DELETE CASCADE by default
+                await conn.execute(delete(task_tags).where(task_tags.c.task_id.in_(ids)))
+                await conn.execute(delete(TaskDB.__table__).where(TaskDB.id.in_(ids)))
+        return len(ids)
+
+    def _adapt(self, elapsed_ms: float):
+        self.stats["chunks"] += 1
+        self.stats["last_chunk_ms"] = round(elapsed_ms, 2)
+        if elapsed_ms > self.target_latency_ms:
+            self.stats["slow_chunks"] += 1
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+        else:
+            self.batch_size = min(self.max_batch_size, self.batch_size + self.step)
+
+    async def _vacuum(self):
+        # Postgres is left to autovacuum; SQLite returns free pages to the OS
+        # when the database was created with auto_vacuum = INCREMENTAL
+        if self._engine.dialect.name != "sqlite" or not self.vacuum_pages:
+            return
+        async with self._engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            # executescript steps the pragma to completion; execute() frees one page
+            await raw.driver_connection.executescript(
+                f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});"
+            )
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                purged = await self.purge_once()
+                if purged:
+                    log_event(logger, "tasks_purged", count=purged, batch_size=self.batch_size,
+                              last_chunk_ms=self.stats["last_chunk_ms"])
+            except Exception as e:
+                log_event(logger, "task_purge_failed", logging.ERROR, error=str(e))
+
+
+task_purger = TaskPurger(
+    interval_seconds=settings.purge_interval_seconds,
+    grace_seconds=settings.purge_grace_seconds,
+    batch_size=settings.purge_batch_size,
+    max_batch_size=settings.purge_max_batch_size,
+    target_latency_ms=settings.purge_target_latency_ms,
+    vacuum_pages=settings.purge_vacuum_pages,
+)
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import InterfaceError, OperationalError, StatementError
+
+from ..config import settings
+from ..log import log_event
+from ..models import TaskDB
+from .models import Task, TaskUpdate
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=32)
+def update_statement(fields: Tuple[str, ...]):
+    """Batched UPDATE for one set of columns, reused across flushes"""
+    table = TaskDB.__table__
+    return (
+        update(table)
+        .where(
+            table.c.id == bindparam("b_id"),
+            table.c.owner_id == bindparam("b_owner_id"),
+            table.c.deleted_at.is_(None),
+        )
+        .values({field: bindparam(f"b_{field}") for field in fields + ("updated_at",)})
+    )
+
+
+def fsync_directory(path: str):
+    """Make a rename inside ``path`` durable; a no-op where directories can't be opened"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class TaskWriteQueue:
+    """Write-behind queue for task updates (group commit).
+
+    Updates are acknowledged once they are in memory (and, if configured, in
+    an append-only journal), coalesced per task and written to the database
+    in one transaction every ``interval_ms`` milliseconds. A single flusher
+    runs at a time, so updates to the same task are applied in order.
+    """
+
+    def __init__(self, interval_ms: int = 5, max_batch: int = 500,
+                 journal_path: str = "", fsync: str = "interval"):
+        if fsync not in ("always", "interval", "none"):
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.interval = interval_ms / 1000
+        self.max_batch = max_batch
+        self.journal_path = journal_path
+        self.fsync = fsync
+        # task_id -> (owner_id, values); newer values override older ones
+        self._pending: Dict[int, Tuple[int, dict]] = {}
+        self._inflight: Dict[int, Tuple[int, dict]] = {}
+        self._engine = None
+        self._journal = None
+        self._journal_dirty = False
+        self._runner: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        # Held while writing to the journal, so compaction never swaps it mid-write
+        self._journal_lock: Optional[asyncio.Lock] = None
+        self.stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "flushed_rows": 0,
+            "batches": 0,
+            "failures": 0,
+            "dropped": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None
+
+    async def start(self, engine):
+        """Replay the journal (if any) and start the background flusher"""
+        self._engine = engine
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._journal_lock = asyncio.Lock()
+        if self.journal_path:
+            self._replay_journal()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+            await self.flush()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write out everything still queued"""
+        runner, self._runner = self._runner, None
+        if runner is None:
+            return
+        runner.cancel()
+        try:
+            await runner
+        except asyncio.CancelledError:
+            pass
+        await self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    async def enqueue(self, task_id: int, owner_id: int, values: dict):
+        """Queue an update; returns once it is durable per the fsync policy.
+
+        Raises ``ValueError`` for values the database would reject, since
+        they can no longer be reported to the client at flush time.
+        """
+        self.check_values(values)
+        self.stats["enqueued"] += 1
+        self._merge(task_id, owner_id, values)
+        if self._journal is not None:
+            async with self._journal_lock:
+                self._journal.write(self._journal_line(task_id, owner_id, values))
+                self._journal.flush()
+                self._journal_dirty = True
+                if self.fsync == "always":
+                    await asyncio.to_thread(os.fsync, self._journal.fileno())
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    @staticmethod
+    def check_values(values: dict):
+        columns = TaskDB.__table__.c
+        for field, value in values.items():
+            if field not in columns:
+                raise ValueError(f"Unknown task field: {field}")
+            if value is None and not columns[field].nullable:
+                raise ValueError(f"{field} may not be null")
+
+    def pending_for(self, task_id: int) -> Optional[dict]:
+        """Values queued for a task that are not yet committed"""
+        values = {}
+        for queue in (self._inflight, self._pending):
+            if task_id in queue:
+                values.update(queue[task_id][1])
+        return values or None
+
+    def overlay(self, db_task: TaskDB):
+        """Apply queued values on top of a task read from the database"""
+        values = self.pending_for(db_task.id)
+        if not values:
+            return db_task
+        return Task.model_validate(db_task).model_copy(update=values)
+
+    def discard(self, task_id: int):
+        """Drop queued values for a task (e.g. when it gets deleted)"""
+        self._pending.pop(task_id, None)
+
+    async def flush(self) -> int:
+        """Write all queued updates in a single transaction"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            if self._journal is not None and self._journal_dirty and self.fsync == "interval":
+                await asyncio.to_thread(os.fsync, self._journal.fileno())
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+            try:
+                try:
+                    await self._write_batch(batch)
+                    written = len(batch)
+                except Exception as e:
+                    self.stats["failures"] += 1
+                    if not self._rejected(e):
+                        raise
+                    # One bad row fails the whole transaction: find it row by row
+                    written = await self._write_rows(batch)
+            except BaseException:
+                # Database unavailable (or the flusher cancelled by stop()): put
+                # what is left in front of anything queued meanwhile
+                self._requeue(batch)
+                raise
+            finally:
+                self._inflight = {}
+            self.stats["batches"] += 1
+            self.stats["flushed_rows"] += written
+            # Shielded: a cancelled flusher must not leave the handle on the replaced file
+            await asyncio.shield(self._compact_journal())
+            return written
+
+    async def _write_rows(self, batch: Dict[int, Tuple[int, dict]]) -> int:
+        """Write each update on its own, dropping those the database rejects.
+
+        Entries are removed from ``batch`` once settled, so on an unrelated
+        error only the unwritten ones are left to requeue.
+        """
+        written = 0
+        for task_id in list(batch):
+            try:
+                await self._write_batch({task_id: batch[task_id]})
+                written += 1
+            except Exception as e:
+                if not self._rejected(e):
+                    raise
+                self.stats["dropped"] += 1
+                log_event(logger, "write_behind_update_dropped", logging.ERROR,
+                          task_id=task_id, values=batch[task_id][1], error=str(e))
+            del batch[task_id]
+        return written
+
+    @staticmethod
+    def _rejected(error: Exception) -> bool:
+        # Constraint and type errors are about the data; operational ones
+        # (locked or unreachable database) are worth retrying later
+        return isinstance(error, StatementError) and not isinstance(error, (OperationalError, InterfaceError))
+
+    def _requeue(self, batch: Dict[int, Tuple[int, dict]]):
+        for task_id, (owner_id, values) in batch.items():
+            newer = self._pending.get(task_id)
+            if newer:
+                values = {**values, **newer[1]}
+            self._pending[task_id] = (owner_id, values)
+
+    async def _write_batch(self, batch: Dict[int, Tuple[int, dict]]):
+        now = datetime.utcnow()
+        # One executemany per distinct set of updated columns
+        groups: Dict[tuple, list] = {}
+        for task_id, (owner_id, values) in batch.items():
+            fields = tuple(sorted(values))
+            row = {f"b_{field}": value for field, value in values.items()}
+            row.update(b_id=task_id, b_owner_id=owner_id, b_updated_at=now)
+            groups.setdefault(fields, []).append(row)
+
+        async with self._engine.begin() as conn:
+            for fields, rows in groups.items():
+                await conn.execute(update_statement(fields), rows)
+
+    async def _run(self):
+        # Checked as well as cancelled: wait_for can swallow a cancellation
+        # that arrives just as the wakeup event is set
+        while self._runner is not None:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                log_event(logger, "write_behind_flush_failed", logging.ERROR,
+                          error=str(e), pending=len(self._pending))
+                await asyncio.sleep(self.interval)
+
+    def _merge(self, task_id: int, owner_id: int, values: dict):
+        current = self._pending.get(task_id)
+        if current:
+            self.stats["coalesced"] += 1
+            values = {**current[1], **values}
+        self._pending[task_id] = (owner_id, values)
+
+    @staticmethod
+    def _journal_line(task_id: int, owner_id: int, values: dict) -> str:
+        entry = {"task_id": task_id, "owner_id": owner_id, "values": values}
+        return json.dumps(entry, default=lambda v: v.isoformat()) + "\n"
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn write at the end of the journal
+                values = TaskUpdate(**entry["values"]).model_dump(exclude_unset=True)
+                try:
+                    self.check_values(values)
+                except ValueError as e:
+                    log_event(logger, "write_behind_update_dropped", logging.ERROR,
+                              task_id=entry["task_id"], values=values, error=str(e))
+                    continue
+                self._merge(entry["task_id"], entry["owner_id"], values)
+
+    async def _compact_journal(self):
+        """Replace the journal with one holding only updates not yet committed.
+
+        The new journal is written (and synced, unless fsync is "none") next
+        to the old one and renamed over it, so a crash at any point leaves a
+        complete journal behind. Updates enqueued meanwhile wait for the lock
+        and land in the new file.
+        """
+        if self._journal is None:
+            return
+        async with self._journal_lock:
+            lines = [self._journal_line(task_id, owner_id, values)
+                     for task_id, (owner_id, values) in self._pending.items()]
+            await asyncio.to_thread(self._rewrite_journal, lines, self.fsync != "none")
+            self._journal.close()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal_dirty = False
+
+    def _rewrite_journal(self, lines: List[str], sync: bool):
+        temp_path = f"{self.journal_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        os.replace(temp_path, self.journal_path)
+        if sync:
+            fsync_directory(os.path.dirname(os.path.abspath(self.journal_path)))
+
+task_write_queue = TaskWriteQueue(
+    interval_ms=settings.task_write_behind_interval_ms,
+    max_batch=settings.task_write_behind_max_batch,
+    journal_path=settings.task_write_behind_journal,
+    fsync=settings.task_write_behind_fsync,
+)
@@ -0,0 +1,116 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from jose import JWTError, jwt
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class TokenCodec(ABC):
+    """Turns a claims dict into an access token and back.
+
+    ``decode`` must verify the signature and the ``exp`` claim and raise
+    ``InvalidToken`` for anything it doesn't accept.
+    """
+
+    name = ""
+    # Tokens carry the user id (``uid`` claim) and read routes trust it
+    # without a users lookup, see auth.get_current_user_id
+    carries_user_id = False
+
+    @abstractmethod
+    def encode(self, claims: dict) -> str:
+        ...
+
+    @abstractmethod
+    def decode(self, token: str) -> dict:
+        ...
+
+
+class JWTCodec(TokenCodec):
+    """Standard JWT via python-jose (the default)"""
+
+    name = "jwt"
+
+    def __init__(self, secret_key: str, algorithm: str = "HS256"):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+
+    def encode(self, claims: dict) -> str:
+        return jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise InvalidToken(str(e)) from e
+
+
+class CompactHMACCodec(TokenCodec):
+    """``base64url(json claims).base64url(HMAC-SHA256)`` without a JWT header.
+
+    The HMAC key schedule is computed once and copied per token, and only
+    ``exp`` is checked, so verifying is a hash plus a ``json.loads``.
+    """
+
+    name = "compact"
+    carries_user_id = True
+
+    def __init__(self, secret_key: str, algorithm: str = "HS256"):
+        if algorithm != "HS256":
+            raise ValueError("The compact token codec only supports HS256")
+        self._mac = hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+
+    def encode(self, claims: dict) -> str:
+        claims = dict(claims)
+        if isinstance(claims.get("exp"), datetime):
+            claims["exp"] = calendar.timegm(claims["exp"].utctimetuple())
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return f"{payload}.{_b64encode(self._sign(payload.encode()))}"
+
+    def decode(self, token: str) -> dict:
+        try:
+            payload, signature = token.encode("ascii").split(b".")
+            expected = self._sign(payload)
+            if not hmac.compare_digest(_b64decode(signature), expected):
+                raise InvalidToken("Signature verification failed")
+            claims = json.loads(_b64decode(payload))
+        except (ValueError, UnicodeError) as e:
+            raise InvalidToken("Malformed token") from e
+        if not isinstance(claims, dict):
+            raise InvalidToken("Malformed token")
+        exp = claims.get("exp")
+        if exp is not None and (not isinstance(exp, int) or exp < time.time()):
+            raise InvalidToken("Token has expired")
+        return claims
+
+    def _sign(self, payload: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(payload)
+        return mac.digest()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+CODECS = {codec.name: codec for codec in (JWTCodec, CompactHMACCodec)}
+
+
+def get_token_codec(name: str, secret_key: str, algorithm: str = "HS256") -> TokenCodec:
+    try:
+        return CODECS[name](secret_key, algorithm)
+    except KeyError:
+        raise ValueError(f"Unknown token codec: {name}") from None
@@ -0,0 +1,27 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database import create_tables
+from src.models import User
+
+USERS = [
+    {"id": 1, "username": "owner", "email": "owner@example.com", "hashed_password": "x"},
+    {"id": 2, "username": "other", "email": "other@example.com", "hashed_password": "x"},
+]
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    """A fresh SQLite file database with the app's tables and the two USERS"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(create_tables)
+        await conn.execute(User.__table__.insert(), USERS)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(engine):
+    return async_sessionmaker(engine, expire_on_commit=False)
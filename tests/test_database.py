@@ -0,0 +1,63 @@
+import logging
+import sqlite3
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.util import LRUCache
+
+from src import database
+from src.database import (
+    create_tables, warm_up_pool, check_database, pool_status, install_statement_cache_stats, statement_cache_status,
+)
+from src.tasks.crud import TaskCRUD
+
+
+@pytest.mark.asyncio
+async def test_warm_up_fills_pool_to_min_size(engine, monkeypatch):
+    monkeypatch.setattr(database, "pool_warm", False)
+    assert await warm_up_pool(engine, 3) == 3
+    stats = pool_status(engine)
+    assert stats["checkedin"] == 3
+    assert stats["checkedout"] == 0
+    assert database.pool_warm is True
+
+
+@pytest.mark.asyncio
+async def test_check_database_reports_latency(engine):
+    assert await check_database(engine, timeout=1.0) >= 0
+
+
+@pytest.mark.asyncio
+async def test_prebuilt_statements_hit_the_compiled_cache(engine, monkeypatch):
+    monkeypatch.setattr(database, "statement_cache_stats", {"hits": 0, "misses": 0, "uncached": 0})
+    cache = LRUCache(50)
+    cached = engine.execution_options(compiled_cache=cache)
+    install_statement_cache_stats(cached.sync_engine)
+    async with async_sessionmaker(cached)() as db:
+        for task_id in range(1, 6):
+            await TaskCRUD._select_task(db, task_id, user_id=1)
+
+    status = statement_cache_status(cache)
+    assert status["misses"] == 1
+    assert status["hits"] == 4
+    assert status["hit_rate"] == 0.8
+    assert status["capacity"] == 50
+
+
+@pytest.mark.asyncio
+async def test_existing_database_without_auto_vacuum_is_reported(engine, tmp_path, caplog):
+    async with engine.connect() as conn:
+        assert (await conn.exec_driver_sql("PRAGMA auto_vacuum")).scalar() == 2  # INCREMENTAL
+
+    # A database made before the pragma was set keeps auto_vacuum = NONE
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE legacy (id INTEGER PRIMARY KEY)")
+    old = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        with caplog.at_level(logging.WARNING, logger="src.database"):
+            async with old.begin() as conn:
+                await conn.run_sync(create_tables)
+    finally:
+        await old.dispose()
+    assert [record.event for record in caplog.records] == ["db_auto_vacuum_off"]
@@ -0,0 +1,81 @@
+import io
+import json
+import logging
+import queue
+import sys
+
+import pytest
+from sqlalchemy import text
+
+from src.log import (
+    ContextQueueHandler, JsonFormatter, RequestStats, SamplingFilter, install_query_timing, log_event,
+    request_id_var, request_stats_var, setup_logging, stop_logging,
+)
+
+
+def _record(level=logging.INFO, event="http_request"):
+    record = logging.LogRecord("test", level, __file__, 1, event, None, None)
+    record.event = event
+    return record
+
+
+def test_sampling_drops_only_sampled_info_events():
+    sampling = SamplingFilter({"http_request": 0.0, "db_query": 1.0})
+    assert not sampling.filter(_record())
+    assert sampling.filter(_record(event="db_query"))
+    assert sampling.filter(_record(event="unlisted"))
+    assert sampling.filter(_record(level=logging.WARNING))
+
+
+def test_json_lines_carry_request_id_and_fields():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    handlers, level = root.handlers, root.level
+    setup_logging("INFO", {"http_request": 1.0}, stream=stream)
+    token = request_id_var.set("req-1")
+    try:
+        log_event(logging.getLogger("test"), "task_created", task_id=7)
+        logging.getLogger("test").info("plain %s", "message")
+    finally:
+        request_id_var.reset(token)
+        stop_logging()
+        root.handlers, root.level = handlers, level
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert lines[0]["event"] == "task_created"
+    assert lines[0]["request_id"] == "req-1"
+    assert lines[0]["task_id"] == 7
+    assert lines[1]["event"] == "plain message"
+
+
+def test_json_formatter_includes_traceback():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("test", logging.ERROR, __file__, 1, "failed", None, sys.exc_info())
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "ERROR"
+    assert "ValueError: boom" in entry["exc"]
+
+
+@pytest.mark.asyncio
+async def test_query_timing_counts_statements_for_the_current_request(engine):
+    install_query_timing(engine.sync_engine)
+    stats = RequestStats()
+    token = request_stats_var.set(stats)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+    finally:
+        request_stats_var.reset(token)
+    assert stats.db_queries == 2
+    assert stats.db_time_ms > 0
+
+
+def test_full_queue_drops_and_counts_records():
+    handler = ContextQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
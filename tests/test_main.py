@@ -1,9 +1,14 @@
+import asyncio
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from src.config import settings
 from src.main import app
+from src import database
 from src.database import get_db, Base
 from src.models import User, TaskDB
 
@@ -49,6 +54,60 @@ def test_read_root():
     assert "Welcome to" in response.json()["message"]
 
 
+def test_liveness_probe():
+    response = client.get("/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+async def get_ready():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get("/ready")
+
+
+@pytest.mark.asyncio
+async def test_ready_retries_a_failed_pool_warm_up(engine, monkeypatch):
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "pool_warm", False)
+    response = await get_ready()
+    assert response.status_code == 200
+    assert response.json()["pool_warm"] is True
+
+
+@pytest.mark.asyncio
+async def test_ready_fails_when_the_database_is_unreachable(tmp_path, monkeypatch):
+    unreachable = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/dir/app.db")
+    monkeypatch.setattr(database, "engine", unreachable)
+    monkeypatch.setattr(database, "pool_warm", False)
+    try:
+        response = await get_ready()
+    finally:
+        await unreachable.dispose()
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+    assert response.json()["pool_warm"] is False
+    assert "unable to open database file" in response.json()["error"]
+
+
+@pytest.mark.asyncio
+async def test_ready_fails_when_the_database_stalls(monkeypatch):
+    async def stall():
+        await asyncio.sleep(3600)
+
+    stalled = create_async_engine("sqlite+aiosqlite://", async_creator=stall)
+    monkeypatch.setattr(database, "engine", stalled)
+    monkeypatch.setattr(database, "pool_warm", True)
+    monkeypatch.setattr(settings, "db_ready_timeout", 0.1)
+    try:
+        response = await asyncio.wait_for(get_ready(), timeout=5)
+    finally:
+        await stalled.dispose()
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+    assert response.json()["error"] == "TimeoutError"
+
+
 def test_register_user():
     response = client.post(
         "/auth/register",
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from src.models import TaskDB, Tag, task_tags
+from src.tasks.purge import TaskPurger
+
+
+async def add_tasks(engine, deleted=0, live=0):
+    long_ago = datetime.utcnow() - timedelta(days=1)
+    async with engine.begin() as conn:
+        await conn.execute(Tag.__table__.insert(), [{"id": 1, "owner_id": 1, "name": "work", "task_count": live}])
+        rows = [
+            {"id": i + 1, "title": f"task {i}", "description": "x" * 500, "owner_id": 1,
+             "deleted_at": long_ago if i < deleted else None}
+            for i in range(deleted + live)
+        ]
+        await conn.execute(TaskDB.__table__.insert(), rows)
+        await conn.execute(task_tags.insert(), [{"task_id": row["id"], "tag_id": 1} for row in rows])
+
+
+async def count(engine, table):
+    async with engine.connect() as conn:
+        return (await conn.execute(select(func.count()).select_from(table))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_purge_removes_only_expired_soft_deletes(engine):
+    await add_tasks(engine, deleted=250, live=20)
+    async with engine.begin() as conn:
+        await conn.execute(TaskDB.__table__.update().where(TaskDB.id == 1).values(deleted_at=datetime.utcnow()))
+    purger = TaskPurger(interval_seconds=3600, grace_seconds=60, batch_size=100, target_latency_ms=10_000)
+    await purger.start(engine)
+    assert await purger.purge_once() == 249
+    await purger.stop()
+    assert await count(engine, TaskDB.__table__) == 21
+    assert await count(engine, task_tags) == 21
+    assert purger.stats["chunks"] == 3
+    async with engine.connect() as conn:
+        assert (await conn.exec_driver_sql("PRAGMA freelist_count")).scalar() == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_chunks_shrink_the_batch(engine):
+    await add_tasks(engine, deleted=120)
+    purger = TaskPurger(interval_seconds=3600, grace_seconds=0, batch_size=64, target_latency_ms=0)
+    await purger.start(engine)
+    assert await purger.purge_once() == 120
+    await purger.stop()
+    assert purger.batch_size < 64
+    assert purger.stats["slow_chunks"] == purger.stats["chunks"]
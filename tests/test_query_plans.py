@@ -0,0 +1,226 @@
+"""Query plan regression tests.
+
+Every statement the data layer issues is captured while running the real
+TaskCRUD / auth code against a seeded dataset, then explained. A plan that
+scans a whole table or sorts through a temporary B-tree fails the test, so
+a dropped index or a query rewritten past its index shows up here.
+"""
+import asyncio
+import json
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.auth import get_user_by_username
+from src.models import TaskDB, User
+from src.seed import generate, seeded_database
+from src.tasks.crud import TaskCRUD
+from src.tasks.models import TaskCreate, TaskUpdate
+from src.tasks.purge import TaskPurger
+from src.tasks.write_behind import TaskWriteQueue
+
+PLAN_USERS = 200
+PLAN_TASKS = 20_000
+
+# "SCAN t" reads the whole table and "SCAN t USING [COVERING] INDEX" the whole
+# index; "SCAN CONSTANT ROW" is SQLite's one-row stand-in table
+SQLITE_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)\S+")
+LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+
+@contextmanager
+def recorded_statements(engine):
+    """Collect (statement, parameters) for everything sent to the database"""
+    statements = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            parameters = parameters[0]
+        statements.setdefault(statement, parameters)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def busiest_user(engine) -> User:
+    async with async_sessionmaker(engine)() as db:
+        user_id = (await db.execute(
+            select(TaskDB.owner_id).group_by(TaskDB.owner_id).order_by(func.count().desc()).limit(1)
+        )).scalar()
+        return await db.get(User, user_id)
+
+
+async def exercise_data_layer(engine, user: User):
+    """Run every query the app issues, as ``user``"""
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    user_id = user.id
+    async with session_maker() as db:
+        await get_user_by_username(db, user.username)
+        # Uniqueness checks done by /auth/register
+        await db.execute(select(User).where(User.username == user.username))
+        await db.execute(select(User).where(User.email == user.email))
+
+    async with session_maker() as db:
+        await TaskCRUD.get_tasks_by_user(db, user_id)
+        await TaskCRUD.get_tasks_by_user(db, user_id, tags=["work", "home"])
+        await TaskCRUD.get_tasks_by_user(db, user_id, tags=["work", "urgent"], match_all=True)
+        await TaskCRUD.get_tag_counts(db, user_id)
+
+    async with session_maker() as db:
+        task = await TaskCRUD.create_task(
+            db, TaskCreate(title="plan", description="", tags=["work", "brand-new"]), user_id
+        )
+    async with session_maker() as db:
+        await TaskCRUD.get_task_by_id(db, task.id, user_id)
+    async with session_maker() as db:
+        await TaskCRUD.update_task(db, task.id, user_id, TaskUpdate(completed=True, tags=["home"]))
+    async with session_maker() as db:
+        await TaskCRUD.delete_task(db, task.id, user_id)
+
+    queue = TaskWriteQueue()
+    await queue.start(engine)
+    await queue.enqueue(task.id, user_id, {"completed": False})
+    await queue.stop()
+
+    purger = TaskPurger(grace_seconds=0)
+    purger._engine = engine
+    await purger._purge_chunk(datetime.utcnow() + timedelta(seconds=1), 100)
+
+
+def sqlite_problems(statement, rows):
+    """Plan rows are (id, parent, notused, detail).
+
+    Table scans and temp B-tree sorts always fail. A full index walk only
+    passes when something bounds it: a LIMIT, or a SEARCH in the same plan.
+    """
+    details = [detail for *_, detail in rows]
+    bounded = LIMIT.search(statement) or any(detail.startswith("SEARCH ") for detail in details)
+    problems = []
+    for detail in details:
+        if "USE TEMP B-TREE" in detail:
+            problems.append(detail)
+        elif SQLITE_SCAN.match(detail) and (" USING " not in detail or not bounded):
+            problems.append(detail)
+    return problems
+
+
+def postgres_problems(plan):
+    problems = []
+    node = plan["Plan"] if "Plan" in plan else plan
+    if node["Node Type"] == "Seq Scan":
+        problems.append(f"Seq Scan on {node['Relation Name']}")
+    elif node["Node Type"] in ("Sort", "Incremental Sort"):
+        problems.append(f"Sort on {', '.join(node.get('Sort Key', []))}")
+    for child in node.get("Plans", []):
+        problems.extend(postgres_problems(child))
+    return problems
+
+
+def explainable(statement: str) -> bool:
+    return statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+@pytest.fixture(scope="module")
+def sqlite_url(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("plans")
+    return asyncio.run(seeded_database(str(directory), users=PLAN_USERS, tasks=PLAN_TASKS, seed=34))
+
+
+@pytest.mark.asyncio
+async def test_sqlite_plans_use_indexes(sqlite_url):
+    engine = create_async_engine(sqlite_url)
+    try:
+        user = await busiest_user(engine)
+        with recorded_statements(engine) as statements:
+            await exercise_data_layer(engine, user)
+        plans = {}
+        async with engine.connect() as conn:
+            for statement, parameters in statements.items():
+                if explainable(statement):
+                    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                    plans[statement] = result.all()
+    finally:
+        await engine.dispose()
+
+    # Sanity check that the workload reached every table
+    for table in ("users", "tasks", "tags", "task_tags"):
+        assert any(f"FROM {table}" in statement or f"UPDATE {table}" in statement for statement in plans), table
+
+    failures = {statement: sqlite_problems(statement, rows) for statement, rows in plans.items()}
+    failures = {statement: problems for statement, problems in failures.items() if problems}
+    assert not failures, "\n\n".join(f"{statement}\n  -> {problems}" for statement, problems in failures.items())
+
+
+@pytest.mark.asyncio
+async def test_sqlite_checker_flags_scans_and_sorts(sqlite_url):
+    queries = {
+        "scan": "SELECT * FROM tasks WHERE title = 'x'",
+        "sort": "SELECT * FROM tasks WHERE owner_id = 1 AND deleted_at IS NULL ORDER BY title",
+        "index walk": "SELECT name FROM tags ORDER BY owner_id, name",
+        "limited index walk": "SELECT name FROM tags ORDER BY owner_id, name LIMIT 5",
+    }
+    engine = create_async_engine(sqlite_url)
+    try:
+        async with engine.connect() as conn:
+            problems = {
+                name: sqlite_problems(query, (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {query}")).all())
+                for name, query in queries.items()
+            }
+    finally:
+        await engine.dispose()
+
+    assert problems["scan"] == ["SCAN tasks"]
+    assert any("USE TEMP B-TREE" in problem for problem in problems["sort"])
+    assert problems["index walk"] == ["SCAN tags USING COVERING INDEX ix_tags_owner_name"]
+    assert problems["limited index walk"] == []
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+@pytest.mark.asyncio
+async def test_postgres_plans_use_indexes():
+    pytest.importorskip("asyncpg")
+
+    url = os.environ["TEST_POSTGRES_URL"]
+    # A throwaway schema: nothing that already lives in the database is touched
+    schema = f"plan_test_{uuid.uuid4().hex[:12]}"
+
+    admin = create_async_engine(url)
+    async with admin.begin() as conn:
+        await conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+    engine = create_async_engine(url, connect_args={"server_settings": {"search_path": schema}})
+    try:
+        await generate(engine, users=PLAN_USERS, tasks=PLAN_TASKS, seed=34)
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("ANALYZE")
+        user = await busiest_user(engine)
+        with recorded_statements(engine) as statements:
+            await exercise_data_layer(engine, user)
+        plans = {}
+        async with engine.connect() as conn:
+            # With these off the planner only scans or sorts when it has no index to use
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+            await conn.exec_driver_sql("SET enable_sort = off")
+            for statement, parameters in statements.items():
+                if explainable(statement):
+                    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                    plan = result.scalar()
+                    plans[statement] = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+            await conn.rollback()
+    finally:
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+        await admin.dispose()
+
+    failures = {statement: postgres_problems(plan) for statement, plan in plans.items()}
+    failures = {statement: problems for statement, problems in failures.items() if problems}
+    assert not failures, "\n\n".join(f"{statement}\n  -> {problems}" for statement, problems in failures.items())
@@ -0,0 +1,57 @@
+from collections import Counter
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.models import Tag, TaskDB, User
+from src.seed import TAG_NAMES, DatasetGenerator, generate
+
+
+def test_same_seed_same_rows():
+    def rows(seed):
+        return list(DatasetGenerator(users=50, tasks=500, seed=seed, sqlite_timestamps=True).task_rows())
+
+    assert rows(7) == rows(7)
+    assert rows(7) != rows(8)
+
+
+def test_tasks_per_user_are_skewed():
+    generator = DatasetGenerator(users=200, tasks=5000, seed=1)
+    per_user = Counter(row[-1] for row, _ in generator.task_rows())
+    busiest = per_user.most_common(1)[0][1]
+    assert busiest > 10 * (5000 / 200)
+
+
+@pytest.mark.asyncio
+async def test_generate_writes_consistent_dataset(tmp_path):
+    # generate() refuses a database that already has users, so not the shared fixture
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/seed.db")
+    try:
+        stats = await generate(engine, users=20, tasks=2000, seed=3, batch_size=300)
+        async with engine.connect() as conn:
+            live_links = (await conn.execute(text(
+                "SELECT count(*) FROM task_tags JOIN tasks ON tasks.id = task_tags.task_id "
+                "WHERE tasks.deleted_at IS NULL"
+            ))).scalar()
+            tag_total = (await conn.execute(text("SELECT sum(task_count) FROM tags"))).scalar()
+            user, task, tag = [
+                (await conn.execute(select(table).limit(1))).one()._mapping
+                for table in (User.__table__, TaskDB.__table__, Tag.__table__)
+            ]
+            foreign = (await conn.execute(text(
+                "SELECT count(*) FROM task_tags JOIN tasks ON tasks.id = task_tags.task_id "
+                "JOIN tags ON tags.id = task_tags.tag_id WHERE tags.owner_id != tasks.owner_id"
+            ))).scalar()
+        with pytest.raises(RuntimeError):
+            await generate(engine, users=20, tasks=10)
+    finally:
+        await engine.dispose()
+
+    # Values land in the columns they were generated for
+    assert user["email"] == f"{user['username']}@example.com"
+    assert isinstance(task["completed"], bool) and 1 <= task["owner_id"] <= 20
+    assert tag["name"] in TAG_NAMES and tag["task_count"] >= 0
+    assert (stats["users"], stats["tasks"], stats["tags"]) == (20, 2000, 20 * 16)
+    assert live_links == tag_total
+    assert foreign == 0
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.exc import DetachedInstanceError
+
+from src.models import TaskDB
+from src.singleflight import SingleFlight
+from src.tasks.crud import TaskCRUD
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution():
+    flights = SingleFlight()
+    executions = []
+
+    async def query(user_id):
+        executions.append(user_id)
+        await asyncio.sleep(0.01)
+        return [user_id]
+
+    results = await asyncio.gather(
+        *(flights.do(("tasks", 1), lambda: query(1)) for _ in range(5)),
+        flights.do(("tasks", 2), lambda: query(2)),
+    )
+    assert results == [[1]] * 5 + [[2]]
+    assert executions == [1, 2]
+    assert flights.metrics() == {"calls": 6, "executions": 2, "deduplicated": 4, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_forget_starts_a_fresh_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def query():
+        calls.append(len(calls))
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    first = asyncio.ensure_future(flights.do(("tasks", 1, "list"), query))
+    await asyncio.sleep(0)
+    flights.forget("tasks", 1)
+    second = await flights.do(("tasks", 1, "list"), query)
+    assert (await first, second) == (2, 2)
+    assert flights.stats["executions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def query():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        *(flights.do(("user", "bob"), query) for _ in range(3)),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    with pytest.raises(RuntimeError):
+        await flights.do(("user", "bob"), query)
+
+
+@pytest.mark.asyncio
+async def test_coalesced_results_are_detached_from_the_loading_session(engine, session_maker):
+    async with engine.begin() as conn:
+        await conn.execute(TaskDB.__table__.insert(), [{"id": 1, "title": "t", "owner_id": 1}])
+    async with session_maker() as first_db, session_maker() as second_db:
+        first, second = await asyncio.gather(
+            TaskCRUD.get_task_by_id(first_db, 1, 1),
+            TaskCRUD.get_task_by_id(second_db, 1, 1),
+        )
+    assert first is second
+    assert object_session(first) is None
+    assert first.title == "t" and first.tags == []
+    with pytest.raises(DetachedInstanceError):
+        first.owner  # lazy loads can't run on somebody else's session
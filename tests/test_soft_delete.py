@@ -0,0 +1,63 @@
+import httpx
+import pytest
+import pytest_asyncio
+
+from src.auth import create_access_token
+from src.database import get_db
+from src.main import app
+from src.tasks.crud import TaskCRUD
+from src.tasks.models import TaskCreate, TaskUpdate
+from src.tasks.write_behind import task_write_queue
+
+
+@pytest_asyncio.fixture
+async def client(session_maker, monkeypatch):
+    """API client for user 1 ("owner") on the fixture database"""
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'owner'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+        yield client
+
+
+@pytest_asyncio.fixture(params=[False, True], ids=["sync", "write-behind"])
+async def write_behind(request, engine):
+    """Run the test with the write-behind queue off and on (PUT takes another path)"""
+    if request.param:
+        await task_write_queue.start(engine)
+    yield request.param
+    if request.param:
+        await task_write_queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_deleted_task_is_gone_from_every_route(client, write_behind):
+    kept = (await client.post("/tasks/create_task", json={"title": "keep", "description": "", "tags": ["work"]})).json()
+    task = (await client.post("/tasks/create_task", json={"title": "drop", "description": "", "tags": ["work"]})).json()
+
+    assert (await client.delete(f"/tasks/{task['id']}")).status_code == 200
+
+    assert [t["id"] for t in (await client.get("/tasks/get_tasks")).json()] == [kept["id"]]
+    assert [t["id"] for t in (await client.get("/tasks/get_tasks", params={"tag": "work"})).json()] == [kept["id"]]
+    assert (await client.get("/tasks/tags")).json() == [{"name": "work", "task_count": 1}]
+    assert (await client.get(f"/tasks/{task['id']}")).status_code == 404
+    assert (await client.put(f"/tasks/{task['id']}", json={"completed": True})).status_code == 404
+    assert (await client.delete(f"/tasks/{task['id']}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_crud_treats_a_deleted_task_as_missing(session_maker):
+    async with session_maker() as db:
+        task = await TaskCRUD.create_task(db, TaskCreate(title="drop", description=""), 1)
+    async with session_maker() as db:
+        assert await TaskCRUD.delete_task(db, task.id, 1)
+
+    async with session_maker() as db:
+        assert await TaskCRUD.get_tasks_by_user(db, 1) == []
+        assert await TaskCRUD.get_task_by_id(db, task.id, 1) is None
+        assert await TaskCRUD.update_task(db, task.id, 1, TaskUpdate(title="back")) is None
+        assert await TaskCRUD.delete_task(db, task.id, 1) is False
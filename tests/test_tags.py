@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from src.tasks.crud import TaskCRUD
+from src.tasks.models import TaskCreate, TaskUpdate
+
+
+async def tag_counts(session_maker, user_id):
+    async with session_maker() as db:
+        return {tag.name: tag.task_count for tag in await TaskCRUD.get_tag_counts(db, user_id)}
+
+
+@pytest.mark.asyncio
+async def test_filter_tasks_by_any_and_all_tags(session_maker):
+    async with session_maker() as db:
+        await TaskCRUD.create_task(db, TaskCreate(title="a", description="", tags=["work", "urgent"]), 1)
+        await TaskCRUD.create_task(db, TaskCreate(title="b", description="", tags=["work"]), 1)
+        await TaskCRUD.create_task(db, TaskCreate(title="c", description="", tags=["home"]), 1)
+        await TaskCRUD.create_task(db, TaskCreate(title="d", description="", tags=["work", "urgent"]), 2)
+
+    async with session_maker() as db:
+        any_tags = await TaskCRUD.get_tasks_by_user(db, 1, tags=["urgent", "home"])
+        all_tags = await TaskCRUD.get_tasks_by_user(db, 1, tags=["work", "urgent"], match_all=True)
+        unknown = await TaskCRUD.get_tasks_by_user(db, 1, tags=["work", "nope"], match_all=True)
+    assert sorted(task.title for task in any_tags) == ["a", "c"]
+    assert [task.title for task in all_tags] == ["a"]
+    assert unknown == []
+
+
+@pytest.mark.asyncio
+async def test_tag_counts_follow_updates_and_deletes(session_maker):
+    async with session_maker() as db:
+        first = await TaskCRUD.create_task(db, TaskCreate(title="a", description="", tags=["work", " work ", "urgent"]), 1)
+        second = await TaskCRUD.create_task(db, TaskCreate(title="b", description="", tags=["work"]), 1)
+    assert await tag_counts(session_maker, 1) == {"urgent": 1, "work": 2}
+
+    async with session_maker() as db:
+        updated = await TaskCRUD.update_task(db, second.id, 1, TaskUpdate(tags=["home"]))
+        assert [tag.name for tag in updated.tags] == ["home"]
+    assert await tag_counts(session_maker, 1) == {"home": 1, "urgent": 1, "work": 1}
+
+    async with session_maker() as db:
+        assert await TaskCRUD.delete_task(db, first.id, 1)
+    assert await tag_counts(session_maker, 1) == {"home": 1, "urgent": 0, "work": 0}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_can_create_the_same_tag(session_maker):
+    async def create(title):
+        async with session_maker() as db:
+            return await TaskCRUD.create_task(db, TaskCreate(title=title, description="", tags=["new"]), 1)
+
+    created = await asyncio.gather(create("a"), create("b"))
+    assert [task.tags[0].name for task in created] == ["new", "new"]
+    assert await tag_counts(session_maker, 1) == {"new": 2}
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src import auth
+from src.tokens import CODECS, CompactHMACCodec, InvalidToken, get_token_codec
+
+SECRET = "test-secret"
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_round_trip_and_tampering(name):
+    codec = get_token_codec(name, SECRET)
+    token = codec.encode({"sub": "alice", "uid": 7, "exp": datetime.utcnow() + timedelta(minutes=5)})
+    claims = codec.decode(token)
+    assert (claims["sub"], claims["uid"]) == ("alice", 7)
+
+    with pytest.raises(InvalidToken):
+        get_token_codec(name, "other-secret").decode(token)
+    with pytest.raises(InvalidToken):
+        codec.decode(token[:-2] + ("AA" if not token.endswith("AA") else "BB"))
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_expired_tokens_are_rejected(name):
+    codec = get_token_codec(name, SECRET)
+    token = codec.encode({"sub": "alice", "exp": datetime.utcnow() - timedelta(seconds=5)})
+    with pytest.raises(InvalidToken):
+        codec.decode(token)
+
+
+def test_compact_codec_rejects_garbage():
+    codec = CompactHMACCodec(SECRET)
+    for token in ["", "abc", "a.b.c", "!!!.???"]:
+        with pytest.raises(InvalidToken):
+            codec.decode(token)
+
+
+@pytest.mark.asyncio
+async def test_user_id_claim_skips_the_users_lookup(monkeypatch):
+    monkeypatch.setattr(auth, "token_codec", CompactHMACCodec(SECRET))
+    token = auth.create_access_token({"sub": "alice", "uid": 7})
+    # No database session: the lookup must not happen
+    assert await auth.get_current_user_id(token, db=None) == 7
+
+    with pytest.raises(HTTPException) as error:
+        await auth.get_current_user_id("not-a-token", db=None)
+    assert error.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_default_codec_ignores_the_user_id_claim(monkeypatch):
+    monkeypatch.setattr(auth, "token_codec", get_token_codec("jwt", SECRET))
+    token = auth.create_access_token({"sub": "alice", "uid": 7})
+    looked_up = []
+
+    async def get_user_by_username(db, username):
+        looked_up.append(username)
+        return SimpleNamespace(id=7, is_active=False)
+
+    monkeypatch.setattr(auth, "get_user_by_username", get_user_by_username)
+    with pytest.raises(HTTPException) as error:
+        await auth.get_current_user_id(token, db=None)
+    assert error.value.status_code == 400
+    assert looked_up == ["alice"]
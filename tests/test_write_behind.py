@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from src.models import TaskDB
+from src.tasks.write_behind import TaskWriteQueue
+
+
+@pytest_asyncio.fixture
+async def engine(engine):
+    async with engine.begin() as conn:
+        await conn.execute(TaskDB.__table__.insert(), [
+            {"id": 1, "title": "Toggle me", "description": "", "completed": False, "owner_id": 1},
+            {"id": 2, "title": "Other", "description": "", "completed": False, "owner_id": 1},
+        ])
+    return engine
+
+
+async def read_task(engine, task_id):
+    async with engine.connect() as conn:
+        result = await conn.execute(select(TaskDB.__table__).where(TaskDB.id == task_id))
+        return result.one()
+
+
+@pytest.mark.asyncio
+async def test_toggles_are_coalesced_into_one_batch(engine):
+    queue = TaskWriteQueue(interval_ms=60_000)
+    await queue.start(engine)
+    for i in range(10):
+        await queue.enqueue(1, 1, {"completed": i % 2 == 0})
+    await queue.enqueue(2, 1, {"title": "Renamed"})
+    assert queue.pending_for(1) == {"completed": False}
+
+    assert await queue.flush() == 2
+    assert queue.stats["coalesced"] == 9
+    assert queue.stats["batches"] == 1
+    assert (await read_task(engine, 1)).completed is False
+    assert (await read_task(engine, 2)).title == "Renamed"
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_updates_for_other_owner_are_ignored(engine):
+    queue = TaskWriteQueue(interval_ms=60_000)
+    await queue.start(engine)
+    await queue.enqueue(1, 2, {"completed": True})
+    await queue.stop()
+    assert (await read_task(engine, 1)).completed is False
+
+
+@pytest.mark.asyncio
+async def test_stop_returns_when_cancelled_right_after_a_wakeup(engine):
+    queue = TaskWriteQueue(interval_ms=60_000, max_batch=1)
+    await queue.start(engine)
+    runner = queue._runner
+    await asyncio.sleep(0)  # the flusher is now waiting for a wakeup
+    await queue.enqueue(1, 1, {"completed": True})  # full batch: wakes it up
+    await asyncio.wait({asyncio.ensure_future(queue.stop())}, timeout=1)
+    assert runner.done()
+    assert (await read_task(engine, 1)).completed is True
+
+
+@pytest.mark.asyncio
+async def test_journal_is_replayed_after_crash(engine, tmp_path):
+    journal = str(tmp_path / "tasks.journal")
+    crashed = TaskWriteQueue(interval_ms=60_000, journal_path=journal, fsync="always")
+    await crashed.start(engine)
+    await crashed.enqueue(1, 1, {"completed": True})
+    await crashed.enqueue(2, 1, {"deadline": "2030-01-01T12:00:00"})
+    crashed._runner.cancel()  # process dies before the flusher runs
+
+    recovered = TaskWriteQueue(interval_ms=60_000, journal_path=journal)
+    await recovered.start(engine)
+    assert (await read_task(engine, 1)).completed is True
+    assert (await read_task(engine, 2)).deadline.year == 2030
+    await recovered.stop()
+    with open(journal) as f:
+        assert f.read() == ""
+
+
+@pytest.mark.asyncio
+async def test_compacted_journal_keeps_updates_queued_during_a_flush(engine, tmp_path):
+    journal = tmp_path / "tasks.journal"
+    queue = TaskWriteQueue(interval_ms=60_000, journal_path=str(journal), fsync="always")
+    await queue.start(engine)
+    write_batch = queue._write_batch
+
+    async def write_while_another_update_arrives(batch):
+        await write_batch(batch)
+        await queue.enqueue(2, 1, {"title": "Queued meanwhile"})
+
+    queue._write_batch = write_while_another_update_arrives
+    await queue.enqueue(1, 1, {"completed": True})
+    assert await queue.flush() == 1
+
+    entries = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert entries == [{"task_id": 2, "owner_id": 1, "values": {"title": "Queued meanwhile"}}]
+    assert not (tmp_path / "tasks.journal.tmp").exists()
+    # The handle was reopened on the new file: later updates are journaled too
+    queue._write_batch = write_batch
+    await queue.enqueue(1, 1, {"completed": False})
+    assert len(journal.read_text().splitlines()) == 2
+    await queue.stop()
+    assert journal.read_text() == ""
+    assert (await read_task(engine, 2)).title == "Queued meanwhile"
+
+
+@pytest.mark.asyncio
+async def test_null_for_not_null_column_is_rejected_on_enqueue(engine):
+    queue = TaskWriteQueue(interval_ms=60_000)
+    await queue.start(engine)
+    with pytest.raises(ValueError):
+        await queue.enqueue(1, 1, {"title": None})
+    assert queue.pending_for(1) is None
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_rejected_row_is_dropped_and_the_rest_written(engine):
+    queue = TaskWriteQueue(interval_ms=60_000)
+    await queue.start(engine)
+    queue._merge(1, 1, {"title": None})  # bypasses enqueue's check, as an old journal would
+    await queue.enqueue(2, 1, {"completed": True})
+
+    assert await queue.flush() == 1
+    assert queue.stats["dropped"] == 1
+    assert queue.pending_for(1) is None
+    assert (await read_task(engine, 1)).title == "Toggle me"
+    assert (await read_task(engine, 2)).completed is True
+    await queue.stop()